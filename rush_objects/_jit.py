@@ -0,0 +1,129 @@
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:
+    # Without numba the kernels run as plain python (same results, slower)
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda function: function
+
+
+def edge_masks(size):
+    """
+    Bitboards (bit row*size+col) of the border cells of a square board,
+    arranged as [orid, (backward, forward)] in an int64 array.
+    orid == 0 (vertical) -> (top row, bottom row)
+    orid == 1 (horizontal) -> (left column, right column)
+    """
+    row = (1 << size) - 1
+    column = sum(1 << (index*size) for index in range(size))
+    edges = [[row, row << (size*(size-1))], [column, column << (size-1)]]
+    # Boards up to 8x8 use the sign bit as well: wrap into int64
+    return np.array(edges, dtype=np.uint64).view(np.int64)
+
+
+# Outcomes of the 'bfs' kernel
+SOLVED = 0
+UNSOLVABLE = 1
+OUT_OF_STATES = -1
+OUT_OF_DEPTH = -2
+
+
+@njit(cache=True)
+def bfs(start, bases, strides, lengths, orids, size, edges, bits, target, goal, 
+        max_states, max_depth):
+    """
+    Breadth first search over compact states: each car is described by its
+    offset along its own row/column, stored in 'bits' bits (head of the car
+    = bases + offset*strides).
+
+    Arguments:
+    ----------
+    - start  : int64, compact initial state
+    - bases  : int64[n_cars], head of each car at offset 0
+    - strides: int64[n_cars], head displacement of each car per offset
+    - lengths: int64[n_cars], length of each car
+    - orids  : int64[n_cars], orientation identifier, 1 == horizontal, 0 == vertical
+    - size   : int, dimension of the square board
+    - edges  : int64[2,2], border bitboards as returned by 'edge_masks'
+    - bits   : int, bits per car in the compact state
+    - target : int, index of the target car
+    - goal   : int, offset of the target car in the goal states
+    - max_states: int, maximum number of states that can be reached
+    - max_depth : int, maximum depth of the search
+
+    Returns:
+    --------
+    (int64[:], int, int), the compact states from 'start' to the goal 
+    (empty if the search failed), the number of expanded states and the
+    outcome: SOLVED, UNSOLVABLE (all the reachable states were expanded),
+    OUT_OF_STATES ('max_states' reached) or OUT_OF_DEPTH ('max_depth' reached)
+    """
+    ncars = bases.shape[0]
+    field = (np.int64(1) << bits) - 1
+    empty = np.empty(0, dtype=np.int64)
+
+    # Reached states, each pointing to its parent (the root to -1)
+    parents = dict()
+    parents[start] = np.int64(-1)
+    queue = np.empty(max_states, dtype=np.int64)
+    depths = np.empty(max_states, dtype=np.int64)
+    queue[0] = start
+    depths[0] = 0
+    head, tail = 0, 1
+    masks = np.empty(ncars, dtype=np.int64)
+
+    found = -1
+    if (start >> (target*bits)) & field == goal:
+        found = start
+    while head < tail and found < 0:
+        state = queue[head]
+        depth = depths[head]
+        head += 1
+        if depth == max_depth:
+            return empty, head - 1, OUT_OF_DEPTH
+
+        occ = np.int64(0)
+        for i in range(ncars):
+            first = bases[i] + ((state >> (i*bits)) & field)*strides[i]
+            mask = np.int64(0)
+            for k in range(lengths[i]):
+                mask |= np.int64(1) << (first + k*strides[i])
+            masks[i] = mask
+            occ |= mask
+
+        for i in range(ncars):
+            others = occ ^ masks[i]
+            for direction in range(2):
+                if direction == 0:
+                    legal = (masks[i] & edges[orids[i], 0]) == 0 and \
+                            (masks[i] & (others << strides[i])) == 0
+                    child = state - (np.int64(1) << (i*bits))
+                else:
+                    legal = (masks[i] & edges[orids[i], 1]) == 0 and \
+                            ((masks[i] << strides[i]) & others) == 0
+                    child = state + (np.int64(1) << (i*bits))
+                if not legal or child in parents:
+                    continue
+                if tail == max_states:
+                    return empty, head, OUT_OF_STATES
+                parents[child] = state
+                queue[tail] = child
+                depths[tail] = depth + 1
+                tail += 1
+                if (child >> (target*bits)) & field == goal:
+                    found = child
+                    break
+            if found >= 0:
+                break
+
+    if found < 0:
+        return empty, head, UNSOLVABLE
+
+    path = [found]
+    while parents[path[-1]] >= 0:
+        path.append(parents[path[-1]])
+    # The state being expanded when the goal was found does not count
+    return np.array(path[::-1], dtype=np.int64), max(head - 1, 0), SOLVED
@@ -1,10 +1,11 @@
 from colorama import Fore
 from colorama import Style
-from copy import deepcopy
-from collections import OrderedDict
 import numpy as np
 from rush_objects.core import Problem
 
+# Number of set bits of an int (int.bit_count is only there from python 3.10)
+popcount = getattr(int, "bit_count", lambda value: bin(value).count("1"))
+
 # ------------------------- COLOR DEFINITIONS ----------------------- #
 DEFAULT_COLORS = dict()
 DEFAULT_COLORS["green"] = Fore.GREEN
@@ -36,54 +37,78 @@ class Car(object):
     - position: list or tuple of the form [x,y] 
     - length: int, length of the car 
     - orientation: string, orientation of the car "v"/"h" 
+    - size: int, dimension of the (square) board hosting the car (required,
+            the bitboards depend on it: use 'board.size')
 
     Attributes (generated):
     -----------------------
     - color: the color 
+    - forecolor: the colored marker of the car, used for rendering
+    - row, col: the 'position' (first cell) of the car
+    - length: the length of the car
     - orid : orientation identifier, 1 == horizontal, 0 == vertical
-    - place: the indices 'slice'
+    - size : the dimension of the board
+    - mask : int, bitboard of the cells covered by the car
+    - back_mask : int, cell entered when moving the car by -1 (0 if the
+                  move would leave the board)
+    - front_mask: int, cell entered when moving the car by +1 (0 if the
+                  move would leave the board)
     
     Properties (runtime-evaluation)
     -------------------------------
     - position: the 'position' of the car
-    - length  : the length of the car
     - orientation: the orientation of the car
     - npindices: the slice that correspond to the position of the car
-    - get_color: API to connect with Fore for rendering 
     
     NOTE: Color is completely obsolete and should be removed in the future
     """
     # Use of __slots__ instead of __dict__ reduces memory consumption 
-    __slots__ = ["color","place","orid"]
+    __slots__ = ["color","forecolor","row","col","length","orid","size","mask","back_mask","front_mask"]
 
-    def __init__(self, color, position, length, orientation):
+    def __init__(self, color, position, length, orientation, size):
         self.color = color
-        row,col = position 
+        self.forecolor = '\x1b[1m'+Style.BRIGHT+DEFAULT_COLORS.get(color,Fore.RESET)+"X"+Style.RESET_ALL
+        self.size = size
+        self.row,self.col = (int(index) for index in position)
+        self.length = int(length)
         if orientation == "h":
             self.orid = 1
-            self.place = [row,np.arange(col,col+length,dtype=int)]
         elif orientation == "v":
             self.orid = 0
-            self.place = [np.arange(row,row+length,dtype=int),col]
         else:
             raise ValueError("Unrecognized orientation: %s"%orientation) 
+        self.update_masks()
     
     @property
-    def position(self):
-        """Returns the (starting-point)/position of the car"""
-        if self.orid == 0: 
-            return (self.place[0][0],self.place[1])
-        else:
-            return (self.place[0],self.place[1][0])
+    def stride(self):
+        """Bit-distance between two consecutive cells of the car"""
+        return 1 if self.orid else self.size
     
-    @property
-    def forecolor(self):
-        return '\x1b[1m'+Style.BRIGHT+DEFAULT_COLORS[self.color]+"X"+Style.RESET_ALL
+    def update_masks(self):
+        """
+        Recompute the bitboard of the car and the cells it would enter
+        moving by -1/+1. Cells falling outside the board are not 
+        represented (same as numpy slicing would do).
+        """
+        mask = 0
+        for step in range(self.length):
+            row = self.row + step*(1-self.orid)
+            col = self.col + step*self.orid
+            if 0 <= row < self.size and 0 <= col < self.size:
+                mask |= 1 << (row*self.size + col)
+        self.mask = mask
+        
+        start = self.col if self.orid else self.row
+        head = self.row*self.size + self.col
+        inside = self.is_inside()
+        self.back_mask = 1 << (head - self.stride) if inside and start > 0 else 0
+        self.front_mask = 1 << (head + self.length*self.stride) \
+                          if inside and start + self.length < self.size else 0
     
     @property
-    def length(self):
-        """The length of the car"""
-        return self.place[self.orid].shape[0] 
+    def position(self):
+        """Returns the (starting-point)/position of the car"""
+        return (self.row,self.col)
     
     @property
     def orientation(self):
@@ -93,14 +118,14 @@ class Car(object):
     @property
     def npindices(self):
         if self.orid == 0: 
-            return tuple([slice(self.place[0][0],self.place[0][-1]+1,1),self.place[1]]) 
+            return (slice(self.row,self.row+self.length),self.col)
         else:
-            return tuple([self.place[0],slice(self.place[1][0],self.place[1][-1]+1,1)])
+            return (self.row,slice(self.col,self.col+self.length))
         
     
     def astuple(self):
         """Attributes of the instance as tuple (hashable)"""
-        return (self.color,self.position,self.length,self.orientation)
+        return (self.color,(self.row,self.col),self.length,self.orientation)
     
     def can_move(self, step, limit):
         """
@@ -116,10 +141,17 @@ class Car(object):
         --------
           boolean regarding the validity of the movement 
         """
+        start = self.col if self.orid else self.row
         if step < 0: 
-            return self.place[self.orid][0] + step >= limit
+            return start + step >= limit
         else:
-            return self.place[self.orid][-1] + step < limit 
+            return start + self.length - 1 + step < limit 
+
+    def is_inside(self):
+        """Routine to check that all the cells of the car lie on the board"""
+        lastrow = self.row + (self.length-1)*(1-self.orid)
+        lastcol = self.col + (self.length-1)*self.orid
+        return self.row >= 0 and self.col >= 0 and lastrow < self.size and lastcol < self.size
 
     # --------------------- BUILD-IN OVERLOADS ----------------------- # 
         
@@ -135,33 +167,36 @@ class Car(object):
         """Moves the car along the positive direction 'other' steps"""
         if abs(other) != 1:
             raise ValueError("Absolute displacement of a 'car' must be 1")
-        self.place[self.orid] += other; return self
+        if self.orid: 
+            self.col += other
+        else:
+            self.row += other
+        self.update_masks(); return self
     
     def __isub__(self, other):
         """Moves the car along the negative direction 'other' steps"""
         if abs(other) != 1:
             raise ValueError("Absolute displacement of a 'car' must be 1")
-        self.place[self.orid] -= other; return self
+        if self.orid: 
+            self.col -= other
+        else:
+            self.row -= other
+        self.update_masks(); return self
 
     @classmethod
-    def from_slots(cls, color, place, orid):
+    def from_slots(cls, color, row, col, length, orid, size):
         """
         Constructs an instance given the properties as declared in
         the '__slots__' attribute of the class 
         """
-        x,y = place 
         if orid == 0:
             orientation = "v" 
-            position = [x[0], y]
-            length = x.shape[0]
         elif orid == 1:
             orientation = "h"
-            position = [x, y[0]]
-            length = y.shape[0]
         else:
             raise ValueError("Wrong specifiers. Cannot construct instanse") 
 
-        return cls(color, position, length, orientation) 
+        return cls(color, (row, col), length, orientation, size) 
             
 
 class Board(object):
@@ -169,6 +204,9 @@ class Board(object):
     Class to represent a board of specific (square) size, contaning
     a set of Cars, upon its limits. 
     
+    The cars are stored as parallel lists (struct of arrays), indexed
+    by the order of insertion; 'color_to_id' maps a color to its index.
+    
     Arguments:
     ----------
     - size   : int, dimension of the square board
@@ -176,62 +214,108 @@ class Board(object):
     
     Attributes:
     -----------
-    - view: np.ndarray, view of the board 
-    - cars: OrderedDict of Cars 
+    - size: int, dimension of the square board
     - exitrow: int, row where the exit of the board is located
+    - occ : int, bitboard of the occupied cells (bit row*size+col)
+    - colors : list, the color of each car
+    - forecolors: list, the colored marker of each car, used for rendering
+    - heads  : list, the index (row*size+col) of the first cell of each car
+    - lengths: list, the length of each car
+    - orids  : list, orientation identifier of each car, 1 == horizontal
+    - masks  : list, the bitboard of the cells covered by each car
+    - steps  : list, the (back_mask, front_mask) of each car, see Car
+    - color_to_id: dict, index of the car of a given color
+    - state: tuple, cached output of 'get_state' (None when outdated)
     
     Properties:
     -----------
+    - view: np.ndarray, view of the board (materialized from 'occ')
     - connected_states: tuple, the 'board-states' that can be 
                         reached upon a displacement of a any
                         car (if allowed) by +1,-1 
-                        
+    
+    NOTE: there is no 'cars' dict of Car objects any more. 'board[color]' 
+    returns a new Car built from the lists: 'board[color] += 1' (or -= 1)
+    still moves the car on the board, because the moved copy is stored 
+    back by __setitem__, but changing the returned Car directly 
+    (car = board[color]; car += 1) leaves the board untouched.
     """
     # Use of __slots__ instead of __dict__ reduces memory consumption 
-    __slots__ = ["view","cars","exitrow"] 
+    __slots__ = ["size","exitrow","occ","colors","forecolors","heads","lengths","orids",
+                 "masks","steps","color_to_id","state"] 
     
     def __init__(self, size, exitrow):
-        self.view = np.zeros((size,size),dtype=int)
-        self.cars = OrderedDict()
+        self.size = size
         self.exitrow = exitrow
+        self.occ = 0
+        self.colors = list()
+        self.forecolors = list()
+        self.heads = list()
+        self.lengths = list()
+        self.orids = list()
+        self.masks = list()
+        self.steps = list()
+        self.color_to_id = dict()
+        self.state = None
+    
+    @property
+    def view(self):
+        """The occupancy of the board as a (size,size) array of zeros/ones"""
+        cells = [(self.occ >> index) & 1 for index in range(self.size*self.size)]
+        return np.array(cells,dtype=int).reshape(self.size,self.size)
         
     @property
     def occupied_places(self):
-        return np.count_nonzero(self.view) 
+        return popcount(self.occ)
     
     def insert_car(self,color,position,length,orientation):
         """Routine to add a Car in the Board if the color has not been used"""
-        car = Car(color,position,length,orientation)
+        car = Car(color,position,length,orientation,self.size)
         
-        if not np.all(self.view[car.npindices]==0):
+        if not car.is_inside() or car.mask & self.occ:
             raise ValueError("Unable to place the car\n%s"%car) 
         else:
-            if self.cars.get(car.color,False) == False:
-                self.cars[car.color] = car
-                self.view[car.npindices] = 1
+            if car.color not in self.color_to_id:
+                self._insert_trusted(car)
             else:
                 raise ValueError("Car with color '%s' already inserted"%car.color)
     
+    def _insert_trusted(self, car):
+        """Routine to add a Car without any check (e.g. from a valid state)"""
+        self.color_to_id[car.color] = len(self.colors)
+        self.colors.append(car.color)
+        self.forecolors.append(car.forecolor)
+        self.heads.append(car.row*self.size + car.col)
+        self.lengths.append(car.length)
+        self.orids.append(car.orid)
+        self.masks.append(car.mask)
+        self.steps.append((car.back_mask, car.front_mask))
+        self.occ |= car.mask
+        self.state = None
+    
     def get_state(self):
         """Routine to obtain a hashable form of the board"""
-        cars = [car.astuple() for car in self.cars.values()]
-        return tuple([self.view.shape[0],self.exitrow]+cars) 
+        if self.state is None:
+            cars = [(color, divmod(head, self.size), length, "h" if orid else "v") 
+                    for color, head, length, orid in 
+                    zip(self.colors, self.heads, self.lengths, self.orids)]
+            self.state = tuple([self.size,self.exitrow]+cars) 
+        return self.state
         
     @property
     def connected_states(self):
         states = list() 
-        for color in self.cars.keys():
-            for displacement, boardlimit in [(-1, 0), (1, self.view.shape[0])]:
-                if self.cars[color].can_move(displacement, boardlimit):
-                    # Move the car without changing the 'view'
-                    self.cars[color] += displacement 
-                    
-                    # Check if the 'new' position creates conflicts
-                    if np.any(self.view[self.cars[color].npindices] == 0):
-                        states.append(self.get_state())
-                    
-                    # Return the car to its original position 
-                    self.cars[color] -= displacement
+        state = self.get_state()
+        for index, orid in enumerate(self.orids):
+            color, (row, col), length, orientation = state[index+2]
+            for displacement, step in zip((-1, 1), self.steps[index]):
+                # The car must not leave the board nor enter an occupied cell
+                if step and not step & self.occ:
+                    if orid:
+                        moved = (color, (row, col+displacement), length, orientation)
+                    else:
+                        moved = (color, (row+displacement, col), length, orientation)
+                    states.append(state[:index+2] + (moved,) + state[index+3:])
                     
         return tuple(states)
     
@@ -241,38 +325,46 @@ class Board(object):
         Construct a 'Board' object from a given (hashed) state
         """
         board = cls(state[0],state[1])
-        for item in state[2:]: board.insert_car(*item) 
+        for item in state[2:]: board._insert_trusted(Car(*item, board.size)) 
         return board
             
     def get_view(self):
         """Routine to return a copy of the 'view' of the board"""
-        return self.view.copy() 
+        return self.view 
+    
+    def cars_mask(self):
+        """Routine to compute the union of the bitboards of all the cars"""
+        occ = 0
+        for mask in self.masks:
+            occ |= mask
+        return occ
     
     def update_view(self):
-        """Global update of the 'view' of the board"""
-        self.view[:,:] = 0
-        for car in self.cars.values():
-            self.view[car.npindices] = 1
-        if np.any(self.view>1): 
+        """Global update of the occupancy of the board"""
+        self.occ = self.cars_mask()
+        self.state = None
+        if popcount(self.occ) != sum(self.lengths): 
             raise ValueError("Recreation of the 'view' raised conflicts") 
     
     def render(self, title=None, padding="", return_string=False):
         """Routine to render the view of the board as colored-strings"""
-        mapcolor = lambda x: self.cars[x].forecolor if x!="" else "0" 
-        
         # Fill in the 'string-form' of the board with the cars 
-        strlen = max(map(len,DEFAULT_COLORS.keys()))
-        asstring = np.chararray(self.view.shape,strlen,unicode=True) 
-        for color,car in self.cars.items(): 
-            asstring[car.npindices] = color 
+        grid = [["0"]*self.size for _ in range(self.size)]
+        for forecolor, head, length, orid in zip(self.forecolors, self.heads, self.lengths, self.orids):
+            row, col = divmod(head, self.size)
+            for step in range(length):
+                if orid:
+                    grid[row][col+step] = forecolor
+                else:
+                    grid[row+step][col] = forecolor
         
         # Create output and use pretty-colors 
         output = "" if title is None else title+"\n"
-        for index, line in enumerate(asstring.tolist()):
-            output += "{padding}|{positions}|{target}\n".format(
-                        padding = padding,
-                        positions = "|".join(map(mapcolor,line)),
-                        target = " => EXIT" if index==self.exitrow else "")
+        output += "".join("{padding}|{positions}|{target}\n".format(
+                          padding = padding,
+                          positions = "|".join(line),
+                          target = " => EXIT" if index==self.exitrow else "")
+                          for index, line in enumerate(grid))
         if return_string:
             return output
         else:
@@ -288,42 +380,35 @@ class Board(object):
         used to 'overload' the operation board[color] += value and/or 
         board[color] -= value and not to set a car. 
         """
-        # Current view (before updating) to be able to decline the move.
-        # Remember that the car has been already displaced and we need to
-        # see if it conflicts with the other cars. 
-        safeview = self.get_view()
-        self.update_view() 
+        index = self.color_to_id[color]
         
         # This condition ensures that you didn't try to set a 'car' 
         # instance using this overload as "board[color] = Car(...)"
-        if np.all(safeview==self.view):
+        if moving_car.color != color or moving_car.mask == self.masks[index]:
             raise ValueError("To insert a 'car' instance use 'insert_car' routine ")
         
-        # If we pass this criterion we ensure that the move is allowed 
-        if not np.sum(self.view-safeview) == 0:
+        # The moved car must stay on the board without touching the others.
+        # The board only changes once the move is accepted.
+        if not moving_car.is_inside() or moving_car.mask & (self.occ ^ self.masks[index]):
             print("Move declined. Returning to safety...")
-            # In that case we need to get back to the 'previous' view
-            are_equal = lambda x,y: np.equal(x,y).all()
-            
-            # Assuming that the car moved +1 --> we move backwards
-            moving_car -= 1; self.update_view() 
-            
-            if not are_equal(safeview,self.view):
-                # At this point we know that we move on the wrong 
-                # direction. So we need to do two steps to get back 
-                moving_car += 1; moving_car += 1; self.update_view()
-            
-            # Just for extra-protection before we exit 
-            if not are_equal(safeview,self.view):
-                raise ValueError("Unable to return to last view of the board") 
+            moving_car.row, moving_car.col = divmod(self.heads[index], self.size)
+            moving_car.update_masks()
+        else:
+            self.occ ^= self.masks[index] ^ moving_car.mask
+            self.heads[index] = moving_car.row*self.size + moving_car.col
+            self.masks[index] = moving_car.mask
+            self.steps[index] = (moving_car.back_mask, moving_car.front_mask)
+            self.state = None
                 
     def __getitem__(self,color):
-        """Routine to get a car of specific color as 'item'. Doesn't create 
-        a copy though!! (mutable types)"""
-        return self.cars[color]
+        """Routine to get the car of specific color as 'item'. It is a new 
+        Car instance: changes are stored back only through 'board[color] = ...'"""
+        index = self.color_to_id[color]
+        return Car(color, divmod(self.heads[index], self.size), self.lengths[index],
+                   "h" if self.orids[index] else "v", self.size)
     
     def __str__(self):
-        ncars = len(self.cars.keys())
+        ncars = len(self.colors)
         return "Board with view\n%s\ncontaining %s cars"%(self.view,ncars)
     
     def __repr__(self):
@@ -335,6 +420,12 @@ class RushHour(Problem):
     Takes as input the board with the original arrangement of the cars,
     and allows to solve it with AIMA [artificial intelligence modern approach] methods.
 
+    The states of the problem only carry what changes along the search,
+    i.e. the head (row*size+col) of each car, in the order the cars were
+    inserted in the board, packed in a single int ('bits' bits per car).
+    Colors, lengths and orientations are constant and are kept by the 
+    instance (use 'decode' to get back a Board).
+
     Arguments:
     ----------
     - board: Board or tuple(state)
@@ -345,26 +436,78 @@ class RushHour(Problem):
 
     """
     def __init__(self, board, **kwargs):
-        if isinstance(board, Board):
-            self.initial = Board.from_state(board.get_state())
-        elif isinstance(board, tuple):
-            self.initial = Board.from_state(board)
-        else:
+        # The board is only read here: no need to clone it
+        if isinstance(board, tuple):
+            # A user-provided state: insert the cars with all the checks
+            state, board = board, Board(board[0], board[1])
+            for item in state[2:]: board.insert_car(*item)
+        elif not isinstance(board, Board):
             raise ValueError("RushHour initialized expects 'Board'/'tuple'")
 
         self.target_car = kwargs.get("target", "red")
-        if self.target_car not in self.initial.cars:
+        if self.target_car not in board.color_to_id:
             raise ValueError("Target {} not found in the board".format(self.target_car))
         else:
-            if self.initial[self.target_car].position[0] != self.initial.exitrow:
+            target = board[self.target_car]
+            if target.row != board.exitrow:
                 raise ValueError("Target 'car' not placed in the 'exitrow'")
-            elif self.initial[self.target_car].orientation != 'h':
+            elif target.orientation != 'h':
                 raise ValueError("Target car must be oriented horizontally")
             else:
-                targetcol = self.initial.view.shape[0] - self.initial[self.target_car].length
-                self.target = (self.initial.exitrow, targetcol)
+                self.target = (board.exitrow, board.size - target.length)
+
+        # Constant description of the cars, shared by all the states
+        self.size = board.size
+        self.exitrow = board.exitrow
+        self.colors = tuple(board.colors)
+        self.target_index = board.color_to_id[self.target_car]
+        self.lengths = np.array(board.lengths, dtype=np.int64)
+        self.orids = np.array(board.orids, dtype=np.int64)
+        self.bits = (self.size*self.size - 1).bit_length()
+        self.shifts = tuple(index*self.bits for index in range(len(self.colors)))
+        self.head_mask = (1 << self.bits) - 1
+        self.target_head = self.target[0]*self.size + self.target[1]
+        # Goal: the bits of the target car hold the target head
+        target_shift = self.shifts[self.target_index]
+        self.goal_mask = self.head_mask << target_shift
+        self.goal_bits = self.target_head << target_shift
+
+        # For each car, its bitboard at each head position
+        self.car_masks = [tuple(Car(color, divmod(head, self.size), length, "h" if orid else "v",
+                                    self.size).mask for head in range(self.size*self.size))
+                          for color, length, orid in zip(self.colors, self.lengths, self.orids)]
+        # For each head of the target car, the cells between it and the exit
+        self.exit_paths = tuple(sum(1 << cell for cell in range(head + target.length, 
+                                                                (head//self.size + 1)*self.size))
+                                for head in range(self.size*self.size))
+
+        # Successor generator written for this set of cars (see 'specialize')
+        self._expand = self.specialize()
+
+        Problem.__init__(self, self.encode(board), None)
+
+    def encode(self, board):
+        """
+        Routine to obtain the state of the problem (packed heads of the
+        cars) corresponding to a given board
+        """
+        state = 0
+        for color, shift in zip(self.colors, self.shifts):
+            state |= board.heads[board.color_to_id[color]] << shift
+        return state
 
-        Problem.__init__(self, self.initial.get_state(), None)
+    def heads(self, state):
+        """The heads of the cars, unpacked from the state"""
+        return [(state >> shift) & self.head_mask for shift in self.shifts]
+
+    def decode(self, state):
+        """
+        Construct the 'Board' object corresponding to a given state
+        """
+        board = Board(self.size, self.exitrow)
+        for color, head, length, orid in zip(self.colors, self.heads(state), self.lengths, self.orids):
+            board._insert_trusted(Car(color, divmod(head, self.size), length, "h" if orid else "v", self.size))
+        return board
 
     def actions(self, state):
         """
@@ -374,7 +517,7 @@ class RushHour(Problem):
 
         Arguments:
         ----------
-        state: hashable, the hashable of the state from which the board can be recreated
+        state: int, the packed heads of the cars from which the board can be recreated
 
         Returns:
         --------
@@ -382,7 +525,45 @@ class RushHour(Problem):
             please note that in this case there is a perfect equivalence between
             action and state that can be reached with it.
         """
-        return Board.from_state(state).connected_states
+        return self._expand(state)
+
+    def specialize(self):
+        """
+        Generate the successor function of this problem: the loop over the
+        cars is unrolled and the shift, the displacement and the lookup 
+        tables of each car are constants of the generated code.
+
+        For each car and each head position the tables hold the bitboard 
+        of the car ('car_masks') and the cells entered moving by -1/+1. A move that would
+        leave the board enters the 'wall' bit, beyond the board and always 
+        set in the occupancy, so that every move is a single test.
+
+        Returns:
+        --------
+        function(state) -> tuple, the states that can be reached from 'state'
+        """
+        cells = self.size*self.size
+        wall = 1 << cells
+        namespace = dict()
+        lines = ["def next_states(state):", "    children = list()"]
+        for index, (color, shift) in enumerate(zip(self.colors, self.shifts)):
+            length, orid = int(self.lengths[index]), int(self.orids[index])
+            cars = [Car(color, divmod(head, self.size), length, "h" if orid else "v", self.size)
+                    for head in range(cells)]
+            namespace["mask%d"%index] = self.car_masks[index]
+            namespace["back%d"%index] = tuple(car.back_mask or wall for car in cars)
+            namespace["front%d"%index] = tuple(car.front_mask or wall for car in cars)
+            lines.append("    head%d = (state >> %d) & %d"%(index, shift, self.head_mask))
+        lines.append("    occ = %d | %s"%(wall, " | ".join("mask%d[head%d]"%(index, index)
+                                                         for index in range(len(self.colors)))))
+        for index, shift in enumerate(self.shifts):
+            delta = (1 if self.orids[index] else self.size) << shift
+            lines.append("    if not back%d[head%d] & occ: children.append(state - %d)"%(index, index, delta))
+            lines.append("    if not front%d[head%d] & occ: children.append(state + %d)"%(index, index, delta))
+        lines.append("    return tuple(children)")
+
+        exec("\n".join(lines), namespace)
+        return namespace["next_states"]
 
     def result(self, state, action):
         """
@@ -399,15 +580,70 @@ class RushHour(Problem):
         #assert state != action
         return action
 
+    def solve(self, max_depth=500, printouts=100, astar=False):
+        """
+        Search of the shortest solution: breadth first, with the search
+        specialized for this problem (see 'solvers.bfs_rush'), or A*
+        guided by the heuristic 'h' (see 'solvers.astar_search').
+        Returns the final Node of the solution, False if not found
+        """
+        # solvers imports this module: import the public solvers at call time
+        from rush_objects.solvers import bfs_rush, astar_search
+        if astar:
+            return astar_search(self, max_depth=max_depth, printouts=printouts)
+        return bfs_rush(self, max_depth, printouts)
+
     def h(self, node):
         """
-        h is the heuristic function
+        h is the heuristic function: out of the goal the target car has to
+        move, and so has every car between it and the exit. It never 
+        overestimates the moves left (admissible for A*).
+        """
+        state = node.state
+        if self.goal_test(state):
+            return 0
+        heads = self.heads(state)
+        occ = 0
+        for masks, head in zip(self.car_masks, heads):
+            occ |= masks[head]
+        # A car blocking the way stands on a single cell of it (a horizontal
+        # car in the exit row, ahead of the target, makes the state unsolvable)
+        return 1 + popcount(occ & self.exit_paths[heads[self.target_index]])
+
+    def goal_states(self):
         """
-        raise NotImplementedError
+        All the legal states with the target car in the target position: 
+        every other car is placed anywhere along its own row/column, as 
+        long as it does not overlap with the cars already placed.
+        Their number grows exponentially with the cars: they are generated
+        one at a time, the caller decides how many to draw.
+        """
+        # For each car the possible (head, bitboard) pairs
+        options = list()
+        for index, (head, length, orid) in enumerate(zip(self.heads(self.initial), self.lengths, self.orids)):
+            stride = 1 if orid else self.size
+            if index == self.target_index:
+                starts = [self.target_head]
+            elif orid:
+                starts = [head - head%self.size + col for col in range(self.size-length+1)]
+            else:
+                starts = [head%self.size + row*self.size for row in range(self.size-length+1)]
+            options.append([(start, sum(1 << (start + step*stride) for step in range(length)))
+                            for start in starts])
+
+        # Depth-first placement of the cars, pruned on overlaps
+        stack = [(0, 0, 0)]
+        while stack:
+            index, occ, state = stack.pop()
+            if index == len(options):
+                yield state
+                continue
+            for head, mask in options[index]:
+                if not mask & occ:
+                    stack.append((index+1, occ | mask, state | (head << self.shifts[index])))
 
     def goal_test(self, state):
         """
         Check if target car is in proper position
         """
-        board = Board.from_state(state)
-        return board.cars[self.target_car].position == self.target
+        return state & self.goal_mask == self.goal_bits
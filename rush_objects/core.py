@@ -42,6 +42,18 @@ class Problem(ABC):
         else:
             return state == self.goal
 
+    def goal_states(self):
+        """
+        Return an iterable over the states that satisfy goal_test (used by
+        searches that also expand backwards from the goal). The default 
+        method returns self.goal, as a list. Override this method if the 
+        goal is given by a property of the state rather than by explicit 
+        states (a generator is best when they are many).
+        """
+        if self.goal is None:
+            raise NotImplementedError
+        return list(self.goal) if isinstance(self.goal, list) else [self.goal]
+
     def path_cost(self, c, state1, action, state2):
         """
         Return the cost of a solution path that arrives at state2 from
@@ -63,7 +75,7 @@ class Problem(ABC):
 # ______________________________________________________________________________
 
 
-class Node(ABC):
+class Node(object):
     """
     A node in a search tree.
     Contains a pointer to the parent (the node
@@ -78,6 +90,8 @@ class Node(ABC):
     - action: the action to reach this state from the parent state
     - path_cost: float, the path cost from the root to this state
     """
+    # Use of __slots__ instead of __dict__ reduces memory consumption 
+    __slots__ = ("state","parent","action","path_cost","depth")
 
     def __init__(self, state, parent=None, action=None, path_cost=0):
         """
@@ -88,20 +102,12 @@ class Node(ABC):
         self.action = action
         self.path_cost = path_cost
         self.depth = 0
-        self.parent_list = list() 
         if parent:
             self.depth = parent.depth + 1
-            self.parent_list = parent.parent_list + [self.state]
 
     def __repr__(self):
         return "<Node {}>".format(self.state)
 
-    def __lt__(self, node):
-        # TODO: how to order, if the hashable are not integers?
-        # This is for the case of equality in the f?
-        # return self.state < node.state
-        return True
-
     def expand(self, problem):
         """
         List the nodes reachable in one step from this node.
@@ -122,22 +128,23 @@ class Node(ABC):
         """
         Return the sequence of actions to go from the root to this node.
         """
-        return map(lambda x: x.action, self.path()[1:]) 
+        actions = list()
+        node = self
+        while node.parent is not None:
+            actions.append(node.action)
+            node = node.parent
+        actions.reverse()
+        return actions
 
     def path(self):
         """
-        Return a list of nodes forming the path from the root to this node.
+        Return a list of states forming the path from the root to this node.
         """
-        last_node = self 
-        traceback = [last_node.state]
-        for index in range(self.depth):
-            last_node = last_node.parent
-            traceback.append(last_node.state)
-        return list(reversed(traceback)) 
-
-    def __eq__(self, other):
-        return isinstance(other, Node) and self.state == other.state
-
-    def __hash__(self):
-        return hash(self.state)
+        traceback = list()
+        node = self
+        while node is not None:
+            traceback.append(node.state)
+            node = node.parent
+        traceback.reverse()
+        return traceback
 
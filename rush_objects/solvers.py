@@ -1,5 +1,9 @@
-from collections import deque
+from heapq import heappop, heappush
+from itertools import count, islice
+import numpy as np
 from rush_objects.core import Problem,Node
+from rush_objects.base import RushHour
+from rush_objects._jit import bfs, edge_masks, OUT_OF_STATES, OUT_OF_DEPTH
 
 class BreadthFirstGraphSeach(object):
     """
@@ -10,8 +14,13 @@ class BreadthFirstGraphSeach(object):
             raise ValueError("Algorithm expects a instance of a Problem")
         self.problem = problem 
         self.root = problem.initial
-        self.frontier = deque([Node(self.root)])
-        self.explored = set() 
+        # The frontier is the level of the search being expanded: all the
+        # states at distance 'depth' from the root
+        self.frontier = [self.root]
+        self.depth = 0
+        # Every reached state -> (parent state, action). It is both the
+        # set of reached states and the tree of the search
+        self.came_from = {self.root: (None, None)}
         self.iterations = 0
 
         # Check if the problem that has been provided is trivial
@@ -19,26 +28,392 @@ class BreadthFirstGraphSeach(object):
             print("Initial state of the problem is already a solution") 
 
     def __call__(self,max_depth=500,printouts=100):
+        # Local names for everything used in the loop (no attribute lookups)
+        came_from = self.came_from
+        actions, result = self.problem.actions, self.problem.result
+        goal_test = self.problem.goal_test
+
+        # Each state is tested once: the root here, the others when generated
+        if goal_test(self.root):
+            return self.solution(self.root)
+
         while self.frontier:
-            node = self.frontier.popleft()
-            self.explored.add(node.state)
+            if self.depth == max_depth:
+                print("Could not find solution within the 'depth' limit")
+                return False
+
+            # Expand the whole level, collecting the next one
+            following = list()
+            append = following.append
+            for state in self.frontier:
+                for action in actions(state):
+                    child = result(state, action)
+                    if child in came_from:
+                        continue
+                    came_from[child] = (state, action)
+                    if goal_test(child):
+                        print("Solution found in %s steps"%self.iterations)
+                        return self.solution(child)
+                    append(child)
+
+                self.iterations += 1
+                if self.iterations%printouts == 0:
+                    print("- Checked already {0} nodes".format(self.iterations))
+            self.frontier = following
+            self.depth += 1
+
+        print("Solution could not be found within the limits imposed")
+        self.iterations = 0
+        self.frontier = [self.root]
+        self.depth = 0
+        self.came_from = {self.root: (None, None)}
+        return False
+
+    def solution(self, state):
+        """
+        Build the chain of Nodes from the root to 'state' and return the
+        last one
+        """
+        steps = list()
+        while state is not None:
+            parent, action = self.came_from[state]
+            steps.append((state, action))
+            state = parent
+        steps.reverse()
+
+        node = Node(self.root)
+        for state, action in steps[1:]:
+            cost = self.problem.path_cost(node.path_cost, node.state, action, state)
+            node = Node(state, node, action, cost)
+        return node
+
+
+def bfs_rush(problem,max_depth=500,printouts=100):
+    """
+    BreadthFirstGraphSeach specialized for RushHour: the actions are 
+    already the child states (no 'result'), the goal test is inlined
+    and every move costs 1, so the depth is counted level by level 
+    instead of being stored per state (no 'path_cost').
+
+    Arguments:
+    ----------
+    - problem: RushHour instance
+    - max_depth: int, maximum depth of the search
+    - printouts: int, number of expansions between progress messages
+
+    Returns:
+    --------
+    The final Node of the solution, False if it could not be found
+    """
+    expand = problem._expand
+    goal_mask, goal_bits = problem.goal_mask, problem.goal_bits
+    root = problem.initial
+    parents = {root: None}
+    found = root if root & goal_mask == goal_bits else None
+
+    level, depth, iterations = [root], 0, 0
+    while level and found is None:
+        if depth == max_depth:
+            print("Could not find solution within the 'depth' limit")
+            return False
+        following = list()
+        append = following.append
+        for state in level:
+            for child in expand(state):
+                if child in parents:
+                    continue
+                parents[child] = state
+                if child & goal_mask == goal_bits:
+                    found = child
+                    break
+                append(child)
+            if found is not None:
+                break
+            iterations += 1
+            if iterations%printouts == 0:
+                print("- Checked already {0} nodes".format(iterations))
+        level = following
+        depth += 1
+
+    if found is None:
+        print("Solution could not be found within the limits imposed")
+        return False
+    if found != root:
+        print("Solution found in %s steps"%iterations)
+
+    states = list()
+    while found is not None:
+        states.append(found)
+        found = parents[found]
+    states.reverse()
+    node = Node(root)
+    for cost, state in enumerate(states[1:], 1):
+        node = Node(state, node, state, cost)
+    return node
+
+
+def astar_search(problem,h=None,max_depth=500,printouts=100):
+    """
+    A* graph search: the nodes are expanded by increasing f = g + h, 
+    with g the path cost and h the heuristic. With an admissible h the
+    solution found is the cheapest one.
+    The heap holds (f, counter, node): the counter breaks the ties of f
+    in order of insertion, so that nodes are never compared.
+
+    Arguments:
+    ----------
+    - problem: Problem instance
+    - h: function(node), the heuristic (default is problem.h)
+    - max_depth: int, maximum depth of the search
+    - printouts: int, number of expansions between progress messages
+
+    Returns:
+    --------
+    The final Node of the solution, False if it could not be found
+    """
+    if not isinstance(problem,Problem):
+        raise ValueError("Algorithm expects a instance of a Problem")
+    h = h or problem.h
+    goal_test = problem.goal_test
+    root = Node(problem.initial)
+    # Best known path cost of every reached state
+    best = {root.state: 0}
+    tiebreak = count()
+    frontier = [(h(root), next(tiebreak), root)]
+    iterations = 0
+
+    while frontier:
+        node = heappop(frontier)[2]
+        if node.path_cost > best[node.state]:
+            # Reached again with a lower cost after being pushed
+            continue
+        if goal_test(node.state):
+            print("Solution found in %s steps"%iterations)
+            return node
+        if node.depth == max_depth:
+            continue
+
+        for action in problem.actions(node.state):
+            child = node.child_node(problem, action)
+            if child.state in best and best[child.state] <= child.path_cost:
+                continue
+            best[child.state] = child.path_cost
+            heappush(frontier, (child.path_cost + h(child), next(tiebreak), child))
+
+        iterations += 1
+        if iterations%printouts == 0:
+            print("- Checked already {0} nodes".format(iterations))
+
+    print("Solution could not be found within the limits imposed")
+    return False
+
+
+class BidirectionalGraphSearch(object):
+    """
+    Breadth first search expanding at the same time forward from the
+    initial state and backward from all the goal states of the problem,
+    until the two searches meet. Each side only has to reach half of the
+    solution depth.
+
+    The goal states are drawn lazily from 'problem.goal_states()', never
+    more than the size of the forward frontier: until all of them fit, 
+    only the forward side is expanded (a plain breadth first search). 
+    When the goals are many the search never turns bidirectional, 
+    instead of enumerating them all.
+
+    The moves of the problem must be reversible (if 'b' is a successor 
+    of 'a', then 'a' is a successor of 'b'), as it is in Rush Hour. 
+    """
+    def __init__(self,problem):
+        if not isinstance(problem,Problem):
+            raise ValueError("Algorithm expects a instance of a Problem")
+        self.problem = problem 
+        self.root = problem.initial
+        self.iterations = 0
+
+        # Check if the problem that has been provided is trivial
+        if self.problem.goal_test(self.root):
+            print("Initial state of the problem is already a solution") 
 
-            for child in node.expand(self.problem):
-                if child.state not in self.explored and child not in self.frontier:
-                    if self.problem.goal_test(child.state):
+    def __call__(self,max_depth=500,printouts=100):
+        # For each reached state: (the next state towards the origin of the 
+        # search, the distance from it)
+        forward = {self.root: (None, 0)}
+        backward = dict()
+        frontiers = {"forward": [self.root], "backward": list()}
+        depth = 0
+        self.iterations = 0
+        actions, result = self.problem.actions, self.problem.result
+        goal_test = self.problem.goal_test
+
+        if goal_test(self.root):
+            return self.solution(forward, {self.root: (None, 0)}, self.root)
+
+        # While seeding the goals are not all known: the forward side tests
+        # the states it generates with 'goal_test' instead
+        goals = iter(self.problem.goal_states())
+        seeding = True
+
+        while frontiers["forward"] and (seeding or frontiers["backward"]):
+            if seeding:
+                # Draw at most one goal more than the forward frontier
+                budget = len(frontiers["forward"]) + 1 - len(backward)
+                for goal in islice(goals, max(budget, 0)):
+                    backward[goal] = (None, 0)
+                if len(backward) <= len(frontiers["forward"]):
+                    # The generator is exhausted: start the backward side
+                    seeding = False
+                    frontiers["backward"] = list(backward)
+
+            # Expand a whole level of the smallest frontier
+            if seeding or len(frontiers["forward"]) <= len(frontiers["backward"]):
+                side, reached, other = "forward", forward, backward
+            else:
+                side, reached, other = "backward", backward, forward
+
+            meeting, length = None, None
+            level = list()
+            append = level.append
+            for state in frontiers[side]:
+                distance = reached[state][1] + 1
+                for action in actions(state):
+                    child = result(state, action)
+                    if child in reached:
+                        continue
+                    reached[child] = (state, distance)
+                    append(child)
+                    if seeding and child not in other and goal_test(child):
+                        # Forward only: the first goal reached is the closest
                         print("Solution found in %s steps"%self.iterations)
-                        return child
-                    self.frontier.append(child)
+                        return self.solution(forward, {child: (None, 0)}, child)
+                    if child in other:
+                        total = distance + other[child][1]
+                        if length is None or total < length:
+                            meeting, length = child, total
+
+                self.iterations += 1
+                if self.iterations%printouts == 0:
+                    print("- Checked already {0} nodes".format(self.iterations))
+            frontiers[side] = level
+            depth += 1
 
-            self.iterations += 1
-            if self.iterations%printouts == 0:
-                print("- Checked already {0} nodes".format(self.iterations))
-            if node.depth == max_depth:
+            if meeting is not None:
+                print("Solution found in %s steps"%self.iterations)
+                return self.solution(forward, backward, meeting)
+            if depth == max_depth:
                 print("Could not find solution within the 'depth' limit")
                 return False
 
         print("Solution could not be found within the limits imposed")
-        self.iterations = 0
-        self.frontier = deque([Node(self.root)])
-        self.explored = set() 
         return False
+
+    def solution(self, forward, backward, meeting):
+        """
+        Join the two halves of the path through the 'meeting' state and
+        return the final Node (as BreadthFirstGraphSeach does)
+        """
+        states = list()
+        state = meeting
+        while state is not None:
+            states.append(state)
+            state = forward[state][0]
+        states.reverse()
+        state = backward[meeting][0]
+        while state is not None:
+            states.append(state)
+            state = backward[state][0]
+
+        # Recover the (forward) actions linking consecutive states
+        node = Node(states[0])
+        for state in states[1:]:
+            for action in self.problem.actions(node.state):
+                if self.problem.result(node.state, action) == state:
+                    break
+            cost = self.problem.path_cost(node.path_cost, node.state, action, state)
+            node = Node(state, node, action, cost)
+        return node
+
+
+class CompiledBreadthFirstSearch(object):
+    """
+    Breadth first search for RushHour run entirely by the compiled 'bfs'
+    kernel (numba): the states are int64 with the offset of each car along 
+    its own row/column, the frontier is a preallocated array and the 
+    reached states a dict pointing to their parents. 
+    Only the solution path is converted back to RushHour states.
+
+    Arguments:
+    ----------
+    - problem: RushHour instance
+
+    Keyword arguments:
+    ------------------
+    - max_states: int, maximum number of states that can be reached
+    """
+    def __init__(self,problem,max_states=1<<21):
+        if not isinstance(problem,RushHour):
+            raise ValueError("Algorithm expects a instance of RushHour")
+        self.problem = problem 
+        self.root = problem.initial
+        self.max_states = max_states
+        self.iterations = 0
+
+        # The kernel keeps the bitboards in int64: at most 8x8 boards
+        size = problem.size
+        if size*size > 64:
+            raise ValueError("Compiled search supports boards up to 8x8, got {0}x{0}".format(size))
+        self.edges = edge_masks(size)
+        # Offsets along a line are at most size-length (of the shortest car)
+        self.bits = max(1, (size - int(problem.lengths.min())).bit_length())
+        if len(problem.colors)*self.bits > 63:
+            raise ValueError("Too many cars for the compiled search")
+        self.strides = np.where(problem.orids == 1, 1, size).astype(np.int64)
+        heads = np.array(problem.heads(self.root), dtype=np.int64)
+        self.bases = np.where(problem.orids == 1, heads - heads%size, heads%size).astype(np.int64)
+        self.target = problem.target_index
+        self.goal = (problem.target_head - int(self.bases[self.target]))//int(self.strides[self.target])
+        self.start = self.encode(self.root)
+
+        # Check if the problem that has been provided is trivial
+        if self.problem.goal_test(self.root):
+            print("Initial state of the problem is already a solution") 
+
+    def encode(self, state):
+        """RushHour state -> compact state of the kernel"""
+        compact = 0
+        for index, head in enumerate(self.problem.heads(state)):
+            offset = (head - int(self.bases[index]))//int(self.strides[index])
+            compact |= offset << (index*self.bits)
+        return compact
+
+    def decode(self, compact):
+        """Compact state of the kernel -> RushHour state"""
+        field = (1 << self.bits) - 1
+        state = 0
+        for index, shift in enumerate(self.problem.shifts):
+            offset = (compact >> (index*self.bits)) & field
+            state |= (int(self.bases[index]) + offset*int(self.strides[index])) << shift
+        return state
+
+    def __call__(self,max_depth=500,printouts=100):
+        """'printouts' is accepted for compatibility: the kernel runs uninterrupted"""
+        problem = self.problem
+        path, self.iterations, status = bfs(self.start, self.bases, self.strides, problem.lengths,
+                                            problem.orids, problem.size, self.edges, self.bits,
+                                            self.target, self.goal, self.max_states, max_depth)
+        if status == OUT_OF_STATES:
+            print("Search stopped after reaching {0} states: increase 'max_states'".format(self.max_states))
+            return False
+        elif status == OUT_OF_DEPTH:
+            print("Could not find solution within the 'depth' limit")
+            return False
+        elif len(path) == 0:
+            print("Solution could not be found within the limits imposed")
+            return False
+
+        print("Solution found in %s steps"%self.iterations)
+        node = Node(self.root)
+        for compact in path.tolist()[1:]:
+            state = self.decode(compact)
+            node = Node(state, node, state, problem.path_cost(node.path_cost, node.state, state, state))
+        return node
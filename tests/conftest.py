@@ -0,0 +1,54 @@
+import pytest
+
+from rush_objects.base import Board
+
+
+def notebook_board_1():
+    """First board of PlayRushHour.ipynb (35 moves)"""
+    board = Board(6, 2)
+    board.insert_car('yellow', [0, 2], 3, 'h')
+    board.insert_car('purple', [1, 0], 3, 'h')
+    board.insert_car('red', [2, 0], 2, 'h')
+    board.insert_car('green', [3, 0], 3, 'h')
+    board.insert_car('orange', [4, 0], 2, 'v')
+    board.insert_car('cyan', [4, 2], 2, 'v')
+    board.insert_car('blue', [1, 4], 3, 'v')
+    board.insert_car('light-green', [2, 5], 2, 'v')
+    board.insert_car('pink', [4, 4], 2, 'h')
+    board.insert_car('dark', [5, 4], 2, 'h')
+    return board
+
+
+def notebook_board_2():
+    """Second board of PlayRushHour.ipynb (40 moves)"""
+    board = Board(6, 2)
+    board.insert_car('red', [2, 0], 2, 'h')
+    board.insert_car('purple', [3, 0], 3, 'v')
+    board.insert_car('light-green', [0, 1], 2, 'v')
+    board.insert_car('blue', [5, 1], 3, 'h')
+    board.insert_car('grey', [3, 2], 2, 'v')
+    board.insert_car('another_blue', [1, 2], 2, 'v')
+    board.insert_car('orange', [0, 2], 2, 'h')
+    board.insert_car('green', [1, 3], 2, 'v')
+    board.insert_car('yellow', [3, 3], 2, 'v')
+    board.insert_car('gray', [2, 4], 2, 'v')
+    board.insert_car('cyan', [0, 4], 2, 'v')
+    board.insert_car('dark', [5, 4], 2, 'h')
+    board.insert_car('pink', [0, 5], 2, 'v')
+    board.insert_car('magenta', [2, 5], 3, 'v')
+    return board
+
+
+@pytest.fixture(params=[notebook_board_1, notebook_board_2], ids=["board1", "board2"])
+def notebook_board(request):
+    return request.param()
+
+
+@pytest.fixture
+def blocked_board():
+    """The target car can never reach the exit: a horizontal car is in the way"""
+    board = Board(6, 2)
+    board.insert_car('red', [2, 0], 2, 'h')
+    board.insert_car('blue', [2, 3], 3, 'h')
+    board.insert_car('green', [0, 0], 2, 'v')
+    return board
@@ -0,0 +1,77 @@
+import pytest
+
+from rush_objects.base import Board, Car, RushHour
+
+
+def test_encode_decode_round_trip(notebook_board):
+    problem = RushHour(notebook_board)
+    assert problem.decode(problem.initial).get_state() == notebook_board.get_state()
+    for state in (problem.initial,) + problem.actions(problem.initial):
+        assert problem.encode(problem.decode(state)) == state
+
+
+def test_setitem_accepts_a_legal_move():
+    board = Board(6, 2)
+    board.insert_car('red', [2, 0], 2, 'h')
+    board.insert_car('blue', [0, 4], 3, 'v')
+    occ = board.occ
+
+    board['red'] += 1
+    assert board['red'].position == (2, 1)
+    assert board.occ == occ ^ (1 << 12) ^ (1 << 14)
+    board['blue'] += 1
+    assert board['blue'].position == (1, 4)
+    assert board.occupied_places == 5
+
+
+def test_setitem_declines_an_illegal_move():
+    board = Board(6, 2)
+    board.insert_car('red', [2, 0], 2, 'h')
+    board.insert_car('blue', [0, 2], 3, 'v')
+    state, occ = board.get_state(), board.occ
+
+    board['red'] += 1    # into the blue car
+    board['red'] -= 1    # out of the board
+    board['blue'] -= 1   # out of the board
+    assert board.get_state() == state
+    assert board.occ == occ
+    assert board['red'].position == (2, 0)
+
+
+def test_setitem_does_not_insert_cars():
+    board = Board(6, 2)
+    board.insert_car('red', [2, 0], 2, 'h')
+    with pytest.raises(ValueError):
+        board['red'] = board['red']
+    with pytest.raises(ValueError):
+        board['red'] = Car('blue', (2, 1), 2, 'h', board.size)
+
+
+def test_detached_car_does_not_move_the_board():
+    board = Board(6, 2)
+    board.insert_car('red', [2, 0], 2, 'h')
+    car = board['red']
+    car += 1
+    assert board['red'].position == (2, 0)
+
+
+@pytest.mark.parametrize("position,length,orientation", [
+    ([0, 5], 2, 'h'),    # past the right border
+    ([5, 0], 2, 'v'),    # past the bottom border
+    ([-1, 0], 2, 'v'),   # before the top border
+    ([2, 1], 2, 'h'),    # over the red car
+    ([1, 0], 2, 'v'),    # over the red car
+])
+def test_insert_car_rejects_invalid_cars(position, length, orientation):
+    board = Board(6, 2)
+    board.insert_car('red', [2, 0], 2, 'h')
+    with pytest.raises(ValueError):
+        board.insert_car('blue', position, length, orientation)
+    assert board.colors == ['red']
+
+
+def test_insert_car_rejects_a_repeated_color():
+    board = Board(6, 2)
+    board.insert_car('red', [2, 0], 2, 'h')
+    with pytest.raises(ValueError):
+        board.insert_car('red', [0, 0], 2, 'h')
@@ -0,0 +1,53 @@
+from rush_objects.base import Board, RushHour
+from rush_objects.solvers import BreadthFirstGraphSeach, BidirectionalGraphSearch, CompiledBreadthFirstSearch
+
+
+def assert_valid_path(problem, node):
+    """The path starts at the initial state, moves one car by one cell at a
+    time and ends in a goal state"""
+    path = node.path()
+    assert path[0] == problem.initial
+    assert all(after in problem.actions(before) for before, after in zip(path, path[1:]))
+    assert problem.goal_test(path[-1])
+
+
+def test_compiled_search_with_single_cell_car():
+    # A car of length 1 can move up to offset size-1 along its line
+    board = Board(5, 2)
+    board.insert_car('red', [2, 0], 2, 'h')
+    board.insert_car('x', [4, 4], 1, 'v')
+    board.insert_car('blue', [1, 2], 2, 'v')
+    board.insert_car('green', [3, 2], 2, 'h')
+    problem = RushHour(board)
+
+    search = CompiledBreadthFirstSearch(problem)
+    assert search.decode(search.start) == problem.initial
+    node = search(printouts=10**9)
+    assert_valid_path(problem, node)
+    assert node.path_cost == BreadthFirstGraphSeach(problem)(printouts=10**9).path_cost
+
+
+def solutions(problem):
+    """The solution found by each solver (False when there is none)"""
+    return {
+        "bfs_rush": problem.solve(printouts=10**9),
+        "astar": problem.solve(astar=True, printouts=10**9),
+        "bidirectional": BidirectionalGraphSearch(problem)(printouts=10**9),
+        "compiled": CompiledBreadthFirstSearch(problem)(printouts=10**9),
+    }
+
+
+def test_solvers_agree_with_bfs(notebook_board):
+    problem = RushHour(notebook_board)
+    reference = BreadthFirstGraphSeach(problem)(printouts=10**9)
+    assert_valid_path(problem, reference)
+    for name, node in solutions(problem).items():
+        assert_valid_path(problem, node)
+        assert node.path_cost == reference.path_cost, name
+
+
+def test_unsolvable_board(blocked_board):
+    problem = RushHour(blocked_board)
+    assert BreadthFirstGraphSeach(problem)(printouts=10**9) is False
+    for name, node in solutions(problem).items():
+        assert node is False, name